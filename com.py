@@ -1,4 +1,5 @@
 import binascii
+import time
 
 WRITE_OP        = 0x00
 READ_OP         = 0x01
@@ -20,10 +21,36 @@ CONTRAST_REG    = 0x30
 SAT_REG         = 0x34
 SHARP_REG       = 0x38
 OVERLAY_REG     = 0x3C
+BAUD_REG        = 0x40
 
 HEADER = "AA55"
 FOOTER = "55AA"
 
+# Baud rates selectable through BAUD_REG, the register value is the index in
+# this table. A READ of BAUD_REG returns a bitmask of the indexes supported.
+# A WRITE of another index is answered with that index at the current rate,
+# then the device switches and starts a revert timer back to DEFAULT_BAUD.
+# A WRITE of the current index, sent at the new rate, confirms the switch
+# and stops the timer.
+BAUD_RATES      = (115200, 230400, 460800, 921600, 1000000, 2000000)
+DEFAULT_BAUD    = 115200
+
+# Link tuning parameters
+PING_COUNT      = 4         # pings used to measure the round-trip time
+BURST_COUNT     = 32        # CRC-checked frames sent to validate a new rate
+MAX_ERROR_RATE  = 0.05      # above this error rate the rate is rejected
+SETTLE_TIME     = 0.05      # seconds left to the device to switch rate
+RTT_MARGIN      = 4         # timeout = RTT_MARGIN x worst measured RTT
+MIN_TIMEOUT     = 0.02      # seconds
+PROBE_TIMEOUT   = 0.2       # seconds, used before the RTT is known
+MAX_SYNC_BYTES  = 64        # bytes discarded while looking for a header
+
+class BaudRejected(ValueError):
+    """
+    The device answered a BAUD_REG switch request without accepting it.
+    """
+
+
 def build_frame(op: int, reg: int, value: int) -> str:
     """
     Build a protocol frame:
@@ -82,3 +109,187 @@ def parse_frame(frame: str) -> dict:
         "payload": payload,
         "crc": crc_str,
     }
+
+
+def read_frame(ser) -> dict:
+    """
+    Read one frame from the serial port and parse it.
+    Up to MAX_SYNC_BYTES preceding the header are discarded.
+    Raises TimeoutError (an OSError) if the frame is not complete before
+    ser.timeout, ValueError if no header is found or the frame is invalid.
+    """
+    buf = ""
+    discarded = 0
+    while not buf.endswith(HEADER):
+        if discarded > MAX_SYNC_BYTES:
+            raise ValueError("No frame header found")
+        c = ser.read(1)
+        if not c:
+            raise TimeoutError("No frame header received")
+        buf = (buf + c.decode("ascii", errors="replace"))[-len(HEADER):]
+        discarded += 1
+
+    length_str = ser.read(2).decode("ascii", errors="replace")
+    if len(length_str) != 2:
+        raise TimeoutError("Incomplete length field received")
+    try:
+        length = int(length_str, 16)
+    except ValueError:
+        raise ValueError("Invalid length field")
+
+    remaining = length * 2 + 8 + len(FOOTER)
+    body = ser.read(remaining).decode("ascii", errors="replace")
+    if len(body) != remaining:
+        raise TimeoutError("Incomplete frame received")
+
+    return parse_frame(HEADER + length_str + body)
+
+
+def transact(ser, op: int, reg: int, value: int = 0x00) -> int:
+    """
+    Send a frame and wait for the device answer.
+    Returns the value field of the answer.
+    """
+    frame = build_frame(op, reg, value)
+    ser.write(frame.encode("ascii"))
+    answer = read_frame(ser)
+    payload = answer["payload"]
+    if int(payload[0:2], 16) != op:
+        raise ValueError(f"Unexpected operation in answer: {payload[0:2]}")
+    if int(payload[2:4], 16) != reg:
+        raise ValueError(f"Unexpected register in answer: {payload[2:4]}")
+    return int(payload[4:6], 16)
+
+
+def measure_rtt(ser, count: int = PING_COUNT) -> float:
+    """
+    Ping the device by reading FIRM_ID and return the worst round-trip time
+    in seconds. Raises if any ping fails.
+    """
+    worst = 0.0
+    for _ in range(count):
+        start = time.perf_counter()
+        transact(ser, READ_OP, FIRM_ID)
+        worst = max(worst, time.perf_counter() - start)
+    return worst
+
+
+def error_rate(ser, count: int = BURST_COUNT) -> float:
+    """
+    Send a burst of CRC-checked frames and return the ratio of failed
+    transactions (timeout, serial error, CRC mismatch or malformed answer).
+    The burst stops as soon as MAX_ERROR_RATE is exceeded.
+    """
+    budget = MAX_ERROR_RATE * count
+    errors = 0
+    for _ in range(count):
+        try:
+            transact(ser, READ_OP, FIRM_ID)
+        except (OSError, ValueError):
+            errors += 1
+            ser.reset_input_buffer()
+            if errors > budget:
+                break
+    return errors / count
+
+
+def rtt_timeout(rtt: float) -> float:
+    """
+    Read timeout derived from the measured round-trip time.
+    """
+    return max(MIN_TIMEOUT, rtt * RTT_MARGIN)
+
+
+def _switch_baud(ser, index: int):
+    """
+    Ask the device to move to BAUD_RATES[index] then follow on the host side.
+    The device answers at the current rate before switching, any other
+    answer than index means the rate was not accepted.
+    """
+    accepted = transact(ser, WRITE_OP, BAUD_REG, index)
+    if accepted != index:
+        raise BaudRejected(f"Baud rate index {index} not accepted, got {accepted}")
+    ser.flush()
+    ser.baudrate = BAUD_RATES[index]
+    time.sleep(SETTLE_TIME)
+    ser.reset_input_buffer()
+
+
+def _confirm_baud(ser, index: int):
+    """
+    Confirm BAUD_RATES[index] at the new rate so the device stops its
+    revert timer and keeps the rate while the GUI is idle.
+    """
+    confirmed = transact(ser, WRITE_OP, BAUD_REG, index)
+    if confirmed != index:
+        raise ValueError(f"Baud rate index {index} not confirmed, got {confirmed}")
+
+
+def _fall_back(ser, index: int, rejected: int):
+    """
+    Return to BAUD_RATES[index] after BAUD_RATES[rejected] failed. The
+    request is sent at the rejected rate, which the device may be using, on
+    a best effort basis. The device revert timer is the backstop.
+    """
+    ser.baudrate = BAUD_RATES[rejected]
+    try:
+        ser.write(build_frame(WRITE_OP, BAUD_REG, index).encode("ascii"))
+        ser.flush()
+    except (OSError, ValueError):
+        pass
+    ser.baudrate = BAUD_RATES[index]
+    time.sleep(SETTLE_TIME)
+    ser.reset_input_buffer()
+
+
+def negotiate_link(ser) -> int:
+    """
+    Link setup phase, to call right after the port is opened at DEFAULT_BAUD.
+      - measure the RTT at the default rate
+      - read the supported rates bitmask from BAUD_REG
+      - from the fastest rate down, switch both sides and validate the rate
+        with a burst of frames, fall back to the previous rate on errors
+      - confirm the accepted rate so the device stops its revert timer
+      - derive the read timeout from the RTT measured at the selected rate
+    Returns the selected baud rate. Devices that do not answer keep the
+    default rate and the probe timeout. The write timeout is left untouched.
+    Raises serial errors (OSError) only if the port itself fails.
+    """
+    ser.timeout = PROBE_TIMEOUT
+    ser.reset_input_buffer()
+
+    try:
+        base_timeout = rtt_timeout(measure_rtt(ser))
+        ser.timeout = base_timeout
+        supported = transact(ser, READ_OP, BAUD_REG)
+    except (OSError, ValueError):
+        ser.reset_input_buffer()
+        return ser.baudrate
+
+    base = BAUD_RATES.index(DEFAULT_BAUD)
+    candidates = [i for i in range(len(BAUD_RATES) - 1, base, -1)
+                  if supported & (1 << i)]
+
+    for index in candidates:
+        previous = BAUD_RATES.index(ser.baudrate)
+        try:
+            _switch_baud(ser, index)
+            # Frames are shorter at a faster rate, the base RTT bounds them
+            if error_rate(ser) <= MAX_ERROR_RATE:
+                timeout = rtt_timeout(measure_rtt(ser))
+                _confirm_baud(ser, index)
+                ser.timeout = timeout
+                return ser.baudrate
+        except BaudRejected:
+            # Neither side switched, try the next rate
+            continue
+        except (OSError, ValueError):
+            pass
+        _fall_back(ser, previous, index)
+        ser.timeout = base_timeout
+
+    try:
+        ser.timeout = rtt_timeout(measure_rtt(ser))
+    except (OSError, ValueError):
+        ser.reset_input_buffer()
+    return ser.baudrate
@@ -558,13 +558,20 @@ class MainWindow(QWidget):
 
         if serial_text:
             try:
-                # Open the serial port at 115200 baud
-                self.serial_conn = serial.Serial(port=serial_text, baudrate=115200, timeout=1)
+                # Open the serial port at the default rate then negotiate a faster one
+                self.serial_conn = serial.Serial(port=serial_text, baudrate=com.DEFAULT_BAUD,
+                                                 timeout=com.PROBE_TIMEOUT)
                 if self.serial_conn.is_open:
-                    print(f"Serial port connected to {serial_text} at 115200 baud")
+                    baudrate = com.negotiate_link(self.serial_conn)
+                    print(f"Serial port connected to {serial_text} at {baudrate} baud "
+                          f"(timeout {self.serial_conn.timeout * 1000:.0f} ms)")
                     connected = True
             except Exception as e:
                 print(f"Failed to open serial port {serial_text}: {e}")
+                # Negotiation may fail after the port is opened, release it
+                conn = getattr(self, "serial_conn", None)
+                if conn is not None and conn.is_open:
+                    conn.close()
                 self.serial_conn = None
         else:
             self.serial_conn = None
@@ -0,0 +1,162 @@
+import time
+
+import pytest
+
+import com
+
+
+class FakeDevice:
+    """
+    Serial port stand-in wired to a simulated device. Answers are only
+    produced when the host and the device run at the same rate and the rate
+    is not in `bad_rates`. A read that times out adds ser.timeout to `waited`.
+    A switched rate reverts to DEFAULT_BAUD on idle() until it is confirmed.
+    """
+
+    def __init__(self, supported=None, bad_rates=(), latency=0.0,
+                 accept_baud=True, drop_switch_answer=False):
+        self.baudrate = com.DEFAULT_BAUD
+        self.timeout = None
+        self.write_timeout = None
+        self.device_baud = com.DEFAULT_BAUD
+        self.supported = supported
+        self.bad_rates = set(bad_rates)
+        self.latency = latency
+        self.accept_baud = accept_baud
+        self.drop_switch_answer = drop_switch_answer
+        self.confirmed = True
+        self.host_rates = []
+        self.waited = 0.0
+        self.rx = b""
+
+    def idle(self):
+        if not self.confirmed:
+            self.device_baud = com.DEFAULT_BAUD
+            self.confirmed = True
+
+    def write(self, data):
+        self.host_rates.append(self.baudrate)
+        if self.baudrate != self.device_baud:
+            return len(data)
+        if self.device_baud in self.bad_rates:
+            # Device watchdog: no valid frame at this rate, revert
+            self.device_baud = com.DEFAULT_BAUD
+            self.confirmed = True
+            return len(data)
+        if self.supported is None:
+            return len(data)
+
+        payload = com.parse_frame(data.decode("ascii"))["payload"]
+        op, reg, value = (int(payload[i:i + 2], 16) for i in (0, 2, 4))
+        if reg == com.BAUD_REG and op == com.READ_OP:
+            value = self.supported
+        switch = (reg == com.BAUD_REG and op == com.WRITE_OP
+                  and com.BAUD_RATES[value] != self.device_baud)
+        if reg == com.BAUD_REG and op == com.WRITE_OP and not switch:
+            self.confirmed = True
+        if switch and not self.accept_baud:
+            # Older firmware answers with its current index
+            value = com.BAUD_RATES.index(self.device_baud)
+            switch = False
+        time.sleep(self.latency)
+        if not (switch and self.drop_switch_answer):
+            self.rx += ("00" + com.build_frame(op, reg, value)).encode("ascii")
+        if switch:
+            self.device_baud = com.BAUD_RATES[value]
+            self.confirmed = False
+        return len(data)
+
+    def read(self, size=1):
+        data, self.rx = self.rx[:size], self.rx[size:]
+        if len(data) < size:
+            self.waited += self.timeout
+        return data
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self.rx = b""
+
+
+def mask(*rates):
+    return sum(1 << com.BAUD_RATES.index(rate) for rate in rates)
+
+
+def test_build_parse_roundtrip():
+    frame = com.build_frame(com.WRITE_OP, com.WDR_REG, 0x03)
+    assert com.parse_frame(frame)["payload"] == "000C03"
+
+
+def test_silent_device_keeps_default_baud():
+    ser = FakeDevice()
+    assert com.negotiate_link(ser) == com.DEFAULT_BAUD
+    assert ser.timeout == com.PROBE_TIMEOUT
+    assert ser.write_timeout is None
+
+
+def test_failed_rate_falls_back_quickly():
+    fast = [rate for rate in com.BAUD_RATES if rate != com.DEFAULT_BAUD]
+    ser = FakeDevice(supported=mask(com.DEFAULT_BAUD, *fast), bad_rates=fast)
+    assert com.negotiate_link(ser) == com.DEFAULT_BAUD
+    assert ser.device_baud == com.DEFAULT_BAUD
+    assert ser.waited < 1.0
+    assert ser.write_timeout is None
+
+
+def test_clean_upgrade_picks_fastest_supported_rate():
+    ser = FakeDevice(supported=mask(com.DEFAULT_BAUD, 460800, 921600),
+                     latency=0.01)
+    assert com.negotiate_link(ser) == 921600
+    assert ser.device_baud == 921600
+    assert 0.01 * com.RTT_MARGIN <= ser.timeout < com.PROBE_TIMEOUT
+    assert ser.write_timeout is None
+
+
+def test_confirmed_rate_survives_idle():
+    ser = FakeDevice(supported=mask(com.DEFAULT_BAUD, 921600))
+    assert com.negotiate_link(ser) == 921600
+    ser.idle()
+    assert ser.device_baud == 921600
+    assert com.transact(ser, com.READ_OP, com.FIRM_ID) == 0
+
+
+def test_refused_rate_is_skipped_without_switching():
+    ser = FakeDevice(supported=mask(com.DEFAULT_BAUD, 460800, 921600),
+                     accept_baud=False)
+    assert com.negotiate_link(ser) == com.DEFAULT_BAUD
+    assert set(ser.host_rates) == {com.DEFAULT_BAUD}
+
+
+def test_lost_switch_answer_reverts_at_rejected_rate():
+    ser = FakeDevice(supported=mask(com.DEFAULT_BAUD, 921600),
+                     drop_switch_answer=True)
+    assert com.negotiate_link(ser) == com.DEFAULT_BAUD
+    # Reverted by the host request, not by the device timer
+    assert ser.device_baud == com.DEFAULT_BAUD
+    assert 921600 in ser.host_rates
+
+
+def test_transact_rejects_stale_answer():
+    ser = FakeDevice()
+    ser.timeout = com.MIN_TIMEOUT
+    ser.rx = com.build_frame(com.WRITE_OP, com.BAUD_REG, 0x03).encode("ascii")
+    with pytest.raises(ValueError):
+        com.transact(ser, com.READ_OP, com.BAUD_REG)
+
+
+def test_read_frame_short_length_field():
+    ser = FakeDevice()
+    ser.timeout = com.MIN_TIMEOUT
+    ser.rx = (com.HEADER + "0").encode("ascii")
+    with pytest.raises(TimeoutError):
+        com.read_frame(ser)
+
+
+def test_read_frame_garbage_is_bounded():
+    ser = FakeDevice()
+    ser.timeout = com.MIN_TIMEOUT
+    ser.rx = b"\x00" * (com.MAX_SYNC_BYTES * 4)
+    with pytest.raises(ValueError):
+        com.read_frame(ser)
+    assert ser.rx